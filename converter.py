@@ -4,38 +4,332 @@ Converter routes for Website to PDF Flask application
 """
 
 import os
+import queue
+import shutil
+import sqlite3
 import tempfile
 import threading
 import uuid
 import time
+import json
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from flask import Blueprint, request, jsonify, send_file
+from functools import lru_cache
+from urllib.parse import urlparse
+from flask import Blueprint, Response, request, jsonify, send_file
 from src.web_crawler import WebCrawler
 from src.pdf_generator import PDFGenerator
 import logging
 
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the standard library
+    orjson = None
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 converter_bp = Blueprint('converter', __name__)
 
-# Global dictionary to track conversion jobs
-conversion_jobs = {}
+# Jobs (and their temporary files) are kept for one hour
+JOB_TTL_SECONDS = 3600
+MAX_JOBS = 1000
+
+# How often expired jobs are swept when no new jobs arrive to trigger eviction
+EVICT_INTERVAL_SECONDS = 300
+
+# Downloaded images waiting for OCR before the crawler is made to wait
+OCR_QUEUE_SIZE = 32
+
+# Job state lives next to the application database so every server process shares it
+JOBS_DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'database', 'jobs.db')
+
+JOBS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    max_depth INTEGER NOT NULL,
+    gpu INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL,
+    progress INTEGER NOT NULL DEFAULT 0,
+    message TEXT,
+    error TEXT,
+    pdf_path TEXT,
+    download_name TEXT,
+    temp_dir TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    owner_pid INTEGER,
+    owner_id TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_expires_at ON jobs (expires_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_created_at ON jobs (created_at);
+CREATE TABLE IF NOT EXISTS jobs_revision (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    revision INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO jobs_revision (id, revision) VALUES (0, 0);
+"""
+
+# Statuses after which a job no longer needs the process that ran it
+TERMINAL_STATUSES = ('completed', 'failed')
+
+# Error reported for jobs whose server process died before they finished
+ORPHANED_JOB_ERROR = 'Conversion was interrupted by a server restart'
+
+# Identifies this server process as the owner of the jobs it runs; unlike the
+# pid it is not reused when a restarted server gets the same pid (e.g. pid 1
+# in a container)
+OWNER_ID = uuid.uuid4().hex
+
+def _process_alive(pid):
+    """Check whether a process with this pid exists on this host"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+class JobStore:
+    """
+    SQLite-backed registry of conversion jobs
+    
+    The database runs in WAL mode so that several server processes can share
+    job state (and it survives restarts). Expired jobs are removed with an
+    indexed range delete instead of scanning every job. Jobs left unfinished by
+    a server process that has since died are reported as failed. Every write also bumps
+    a single revision counter, so readers can cheaply tell whether anything
+    changed since they last looked.
+    """
+    def __init__(self, db_path=JOBS_DB_PATH, max_jobs=MAX_JOBS):
+        self.db_path = db_path
+        self.max_jobs = max_jobs
+        self._local = threading.local()
+        
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        conn = self._connection()
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.executescript(JOBS_SCHEMA)
+        self._migrate(conn)
+        self._fail_orphaned(conn)
+    
+    def _migrate(self, conn):
+        """Add columns introduced after a jobs database was first created"""
+        columns = {row['name'] for row in conn.execute('PRAGMA table_info(jobs)')}
+        added = [('download_name', 'TEXT'), ('owner_pid', 'INTEGER'), ('owner_id', 'TEXT')]
+        with conn:
+            for name, column_type in added:
+                if name not in columns:
+                    conn.execute(f'ALTER TABLE jobs ADD COLUMN {name} {column_type}')
+    
+    def _connection(self):
+        """Return this thread's connection to the jobs database"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+    
+    def __setitem__(self, job_id, job):
+        conn = self._connection()
+        self._evict(conn)
+        with conn:
+            conn.execute(
+                'INSERT INTO jobs (job_id, url, max_depth, gpu, status, progress, message, '
+                'error, pdf_path, download_name, temp_dir, created_at, expires_at, '
+                'owner_pid, owner_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (job_id, job.url, job.max_depth, int(job.gpu), job.status, job.progress,
+                 job.message, job.error, job.pdf_path, job.download_name, job.temp_dir,
+                 job.created_at.isoformat(), job.expires_at, os.getpid(), OWNER_ID)
+            )
+            self._bump_revision(conn)
+    
+    def save(self, job):
+        """Persist the mutable status fields of a job"""
+        with self._connection() as conn:
+            conn.execute(
+                'UPDATE jobs SET status = ?, progress = ?, message = ?, error = ?, pdf_path = ?, '
+                'download_name = ? WHERE job_id = ?',
+                (job.status, job.progress, job.message, job.error, job.pdf_path,
+                 job.download_name, job.job_id)
+            )
+            self._bump_revision(conn)
+    
+    def revision(self):
+        """Return the current revision of the job table"""
+        return self._connection().execute(
+            'SELECT revision FROM jobs_revision WHERE id = 0'
+        ).fetchone()[0]
+    
+    def _bump_revision(self, conn):
+        """Record a change to the job table (call inside the writing transaction)"""
+        conn.execute('UPDATE jobs_revision SET revision = revision + 1 WHERE id = 0')
+    
+    def get(self, job_id):
+        """Return a job by id, or None if it is unknown or expired"""
+        conn = self._connection()
+        row = conn.execute(
+            'SELECT * FROM jobs WHERE job_id = ? AND expires_at > ?', (job_id, time.time())
+        ).fetchone()
+        if row is None:
+            return None
+        
+        job = ConversionJob.from_row(row)
+        if job.status not in TERMINAL_STATUSES and not self._owner_alive(row):
+            self._mark_orphaned(conn, [job.job_id])
+            job.status, job.error = 'failed', ORPHANED_JOB_ERROR
+        return job
+    
+    def newest_first(self):
+        """Return all live jobs ordered from newest to oldest"""
+        rows = self._connection().execute(
+            'SELECT * FROM jobs WHERE expires_at > ? ORDER BY created_at DESC', (time.time(),)
+        ).fetchall()
+        return [ConversionJob.from_row(row) for row in rows]
+    
+    def evict(self):
+        """Drop expired jobs and their temporary files, and fail orphaned jobs"""
+        conn = self._connection()
+        self._evict(conn)
+        self._fail_orphaned(conn)
+    
+    @staticmethod
+    def _owner_alive(row):
+        """Check whether the server process that ran a job is still running"""
+        if row['owner_id'] == OWNER_ID:
+            return True
+        pid = row['owner_pid']
+        # Rows from before owners were recorded, and this pid's previous
+        # incarnation, have no live owner
+        if pid is None or pid == os.getpid():
+            return False
+        return _process_alive(pid)
+    
+    def _fail_orphaned(self, conn):
+        """Mark unfinished jobs whose server process has died as failed"""
+        rows = conn.execute(
+            'SELECT job_id, owner_pid, owner_id FROM jobs '
+            'WHERE status NOT IN (?, ?) AND expires_at > ?',
+            TERMINAL_STATUSES + (time.time(),)
+        ).fetchall()
+        orphaned = [row['job_id'] for row in rows if not self._owner_alive(row)]
+        if orphaned:
+            self._mark_orphaned(conn, orphaned)
+    
+    def _mark_orphaned(self, conn, job_ids):
+        """Record jobs as failed because the process running them went away"""
+        with conn:
+            conn.executemany(
+                "UPDATE jobs SET status = 'failed', error = ? WHERE job_id = ?",
+                [(ORPHANED_JOB_ERROR, job_id) for job_id in job_ids]
+            )
+            self._bump_revision(conn)
+        logger.warning(f"Marked {len(job_ids)} interrupted job(s) as failed")
+    
+    def _evict(self, conn):
+        """Drop expired jobs, and the oldest jobs beyond the size cap"""
+        rows = conn.execute(
+            'SELECT job_id, temp_dir FROM jobs WHERE expires_at <= ? '
+            'UNION SELECT job_id, temp_dir FROM '
+            '(SELECT job_id, temp_dir FROM jobs ORDER BY created_at DESC LIMIT -1 OFFSET ?)',
+            (time.time(), self.max_jobs - 1)
+        ).fetchall()
+        if not rows:
+            return
+        
+        with conn:
+            conn.executemany('DELETE FROM jobs WHERE job_id = ?', [(row['job_id'],) for row in rows])
+            self._bump_revision(conn)
+        for row in rows:
+            shutil.rmtree(row['temp_dir'], ignore_errors=True)
+
+# Intermediate crawl/OCR files go to RAM-backed /dev/shm while it has room to spare
+SHM_DIR = '/dev/shm'
+MIN_SHM_FREE_BYTES = 1024 * 1024 * 1024
+
+def job_temp_root():
+    """Return the parent directory for job temp dirs (None means the system default)"""
+    try:
+        if os.path.isdir(SHM_DIR) and shutil.disk_usage(SHM_DIR).free >= MIN_SHM_FREE_BYTES:
+            return SHM_DIR
+    except OSError:
+        pass
+    return None
+
+# Global store to track conversion jobs
+conversion_jobs = JobStore()
+
+def _sweep_expired_jobs():
+    """Evict expired jobs periodically, so an idle server does not keep their files in RAM"""
+    while True:
+        time.sleep(EVICT_INTERVAL_SECONDS)
+        try:
+            conversion_jobs.evict()
+        except Exception as e:
+            logger.warning(f"Expired job sweep failed: {e}")
+
+threading.Thread(target=_sweep_expired_jobs, name='job-sweeper', daemon=True).start()
+
+# Serialized /jobs payload as (revision, valid_until, body); rebuilt only when jobs change
+_jobs_payload_cache = None
+
+# Bounded worker pool: extra requests wait in line instead of oversubscribing the CPU
+_JOB_POOL = ThreadPoolExecutor(max_workers=max(2, (os.cpu_count() or 2) // 2),
+                               thread_name_prefix='conversion')
+
+# Ids of submitted jobs that are still waiting for a worker, oldest first
+_queued_job_ids = []
+_queue_lock = threading.Lock()
+
+@lru_cache(maxsize=None)
+def cuda_available():
+    """Check once whether EasyOCR can run on a CUDA GPU"""
+    try:
+        import torch
+        return torch.cuda.is_available()
+    except ImportError:
+        return False
 
 class ConversionJob:
     """Class to track conversion job status"""
-    def __init__(self, job_id, url, max_depth):
+    def __init__(self, job_id, url, max_depth, gpu=False):
         self.job_id = job_id
         self.url = url
         self.max_depth = max_depth
+        self.gpu = gpu
         self.status = 'starting'
         self.progress = 0
         self.message = 'Initializing conversion...'
         self.error = None
         self.pdf_path = None
+        self.download_name = None
         self.created_at = datetime.now()
-        self.temp_dir = tempfile.mkdtemp(prefix=f'conversion_{job_id}_')
+        self.expires_at = time.time() + JOB_TTL_SECONDS
+        self.temp_dir = tempfile.mkdtemp(prefix=f'conversion_{job_id}_', dir=job_temp_root())
+    
+    @classmethod
+    def from_row(cls, row):
+        """Rebuild a job from its row in the jobs database"""
+        job = cls.__new__(cls)
+        job.job_id = row['job_id']
+        job.url = row['url']
+        job.max_depth = row['max_depth']
+        job.gpu = bool(row['gpu'])
+        job.status = row['status']
+        job.progress = row['progress']
+        job.message = row['message']
+        job.error = row['error']
+        job.pdf_path = row['pdf_path']
+        job.download_name = row['download_name']
+        job.created_at = datetime.fromisoformat(row['created_at'])
+        job.expires_at = row['expires_at']
+        job.temp_dir = row['temp_dir']
+        return job
     
     def update_status(self, status, progress=None, message=None, error=None):
         """Update job status"""
@@ -46,6 +340,7 @@ class ConversionJob:
             self.message = message
         if error is not None:
             self.error = error
+        conversion_jobs.save(self)
         logger.info(f"Job {self.job_id}: {status} - {message}")
 
 @converter_bp.route('/convert', methods=['POST'])
@@ -74,15 +369,21 @@ def start_conversion():
         except ValueError:
             return jsonify({'error': 'Max depth must be a valid number'}), 400
         
+        # Use the GPU for OCR whenever CUDA is present, unless the client opts out
+        use_gpu = data.get('gpu', True)
+        if not isinstance(use_gpu, bool):
+            return jsonify({'error': 'GPU flag must be true or false'}), 400
+        use_gpu = use_gpu and cuda_available()
+        
         # Create new job
         job_id = str(uuid.uuid4())
-        job = ConversionJob(job_id, url, max_depth)
+        job = ConversionJob(job_id, url, max_depth, use_gpu)
         conversion_jobs[job_id] = job
         
-        # Start conversion in background thread
-        thread = threading.Thread(target=run_conversion, args=(job,))
-        thread.daemon = True
-        thread.start()
+        # Queue conversion on the worker pool
+        with _queue_lock:
+            _queued_job_ids.append(job_id)
+        _JOB_POOL.submit(_run_queued_conversion, job)
         
         return jsonify({
             'job_id': job_id,
@@ -109,9 +410,14 @@ def get_conversion_status(job_id):
         'message': job.message,
         'url': job.url,
         'max_depth': job.max_depth,
+        'gpu': job.gpu,
         'created_at': job.created_at.isoformat()
     }
     
+    queue_position = get_queue_position(job_id)
+    if queue_position is not None:
+        response['queue_position'] = queue_position
+    
     if job.error:
         response['error'] = job.error
     
@@ -132,17 +438,14 @@ def download_pdf(job_id):
         return jsonify({'error': 'PDF file not found'}), 404
     
     try:
-        # Generate filename based on URL
-        from urllib.parse import urlparse
-        domain = urlparse(job.url).netloc
-        timestamp = job.created_at.strftime("%Y%m%d_%H%M%S")
-        filename = f"website_pdf_{domain}_{timestamp}.pdf"
-        
+        # conditional=True enables range/If-Modified-Since handling, and the file
+        # is streamed through wsgi.file_wrapper (sendfile under gunicorn/uwsgi)
         return send_file(
             job.pdf_path,
             as_attachment=True,
-            download_name=filename,
-            mimetype='application/pdf'
+            download_name=job.download_name or pdf_download_name(job),
+            mimetype='application/pdf',
+            conditional=True
         )
     except Exception as e:
         logger.error(f"Error downloading PDF: {e}")
@@ -151,10 +454,20 @@ def download_pdf(job_id):
 @converter_bp.route('/jobs', methods=['GET'])
 def list_jobs():
     """List all conversion jobs"""
+    global _jobs_payload_cache
+    
+    # Reuse the serialized payload until a job changes or the oldest one expires
+    revision = conversion_jobs.revision()
+    cached = _jobs_payload_cache
+    if cached and cached[0] == revision and time.time() < cached[1]:
+        return Response(cached[2], mimetype='application/json')
+    
+    jobs = conversion_jobs.newest_first()
     jobs_list = []
-    for job_id, job in conversion_jobs.items():
+    # Already ordered by creation time (newest first)
+    for job in jobs:
         jobs_list.append({
-            'job_id': job_id,
+            'job_id': job.job_id,
             'url': job.url,
             'max_depth': job.max_depth,
             'status': job.status,
@@ -164,19 +477,79 @@ def list_jobs():
             'has_error': job.error is not None
         })
     
-    # Sort by creation time (newest first)
-    jobs_list.sort(key=lambda x: x['created_at'], reverse=True)
+    payload = {'jobs': jobs_list}
+    body = orjson.dumps(payload) if orjson is not None else json.dumps(payload)
+    valid_until = min((job.expires_at for job in jobs), default=float('inf'))
+    _jobs_payload_cache = (revision, valid_until, body)
     
-    return jsonify({'jobs': jobs_list})
+    return Response(body, mimetype='application/json')
+
+def pdf_download_name(job):
+    """Build the filename offered when downloading a job's PDF"""
+    domain = urlparse(job.url).netloc
+    timestamp = job.created_at.strftime("%Y%m%d_%H%M%S")
+    return f"website_pdf_{domain}_{timestamp}.pdf"
+
+def get_queue_position(job_id):
+    """Return the 1-based position of a job waiting for a worker, or None once it has started"""
+    with _queue_lock:
+        try:
+            return _queued_job_ids.index(job_id) + 1
+        except ValueError:
+            return None
+
+def _run_queued_conversion(job):
+    """Worker pool entry point: leave the queue, then run the conversion"""
+    with _queue_lock:
+        _queued_job_ids.remove(job.job_id)
+    run_conversion(job)
 
 def run_conversion(job):
     """Run the complete conversion process"""
+    ocr_pool = None
     try:
-        # Step 1: Web Crawling
+        # Step 1: Web Crawling, with OCR running alongside on each downloaded image
         job.update_status('crawling', 10, 'Starting web crawling...')
         
+        ocr_processor = None
+        try:
+            from src.ocr_processor import OCRProcessor
+            # Cheap to construct: the EasyOCR reader is shared across jobs
+            ocr_processor = OCRProcessor(languages=['en'], gpu=job.gpu)
+        except ImportError:
+            logger.warning("OCR processor not available, skipping OCR processing")
+        except Exception as e:
+            logger.warning(f"OCR processor initialization failed: {e}")
+        
+        ocr_future = None
+        ocr_dir = os.path.join(job.temp_dir, 'ocr_results')
+        if ocr_processor is not None:
+            # Bounded so a fast crawl cannot run far ahead of OCR
+            image_queue = queue.Queue(maxsize=OCR_QUEUE_SIZE)
+            # A dedicated worker: blocking on the shared job pool could deadlock
+            ocr_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f'ocr-{job.job_id[:8]}')
+            ocr_future = ocr_pool.submit(ocr_processor.process_stream, image_queue, ocr_dir)
+            
+            def enqueue_image(img_path):
+                # Stop feeding a consumer that has died instead of blocking forever
+                while not ocr_future.done():
+                    try:
+                        image_queue.put(img_path, timeout=1)
+                        return
+                    except queue.Full:
+                        continue
+            
+            on_image = enqueue_image
+        else:
+            on_image = None
+        
         crawler = WebCrawler(job.temp_dir)
-        crawl_result = crawler.crawl_website(job.url, job.max_depth)
+        try:
+            crawl_result = crawler.crawl_website(job.url, job.max_depth, on_image=on_image)
+        finally:
+            if on_image is not None:
+                # The end-of-stream sentinel; skipped if OCR has already stopped
+                on_image(None)
         
         if 'error' in crawl_result:
             job.update_status('failed', error=f"Crawling failed: {crawl_result['error']}")
@@ -188,31 +561,27 @@ def run_conversion(job):
         job.update_status('crawling', 40, 
                          f'Crawled {pages_crawled} pages, downloaded {images_downloaded} images')
         
-        # Step 2: OCR Processing (if images were found)
-        ocr_dir = None
-        if images_downloaded > 0:
-            job.update_status('ocr', 50, 'Processing images with OCR...')
+        # Step 2: OCR Processing (already under way if images were found)
+        if images_downloaded == 0:
+            job.update_status('ocr', 70, 'No images found, skipping OCR')
+            ocr_dir = None
+        elif ocr_future is None:
+            job.update_status('ocr', 70, 'OCR not available, skipping image text extraction')
+            ocr_dir = None
+        else:
+            job.update_status('ocr', 50, 'Finishing OCR on downloaded images...')
             
             try:
-                from src.ocr_processor import OCRProcessor
-                ocr_processor = OCRProcessor(languages=['en'], gpu=False)
-                images_dir = os.path.join(job.temp_dir, 'images')
-                ocr_dir = os.path.join(job.temp_dir, 'ocr_results')
-                
-                ocr_summary = ocr_processor.process_directory(images_dir, ocr_dir)
+                ocr_summary = ocr_future.result()
                 
                 processed = ocr_summary.get('processed_successfully', 0)
                 job.update_status('ocr', 70, 
                                  f'OCR completed: {processed}/{images_downloaded} images processed')
                 
-            except ImportError:
-                logger.warning("OCR processor not available, skipping OCR processing")
-                job.update_status('ocr', 70, 'OCR not available, skipping image text extraction')
             except Exception as e:
                 logger.warning(f"OCR processing failed: {e}")
                 job.update_status('ocr', 70, 'OCR processing failed, continuing without OCR')
-        else:
-            job.update_status('ocr', 70, 'No images found, skipping OCR')
+                ocr_dir = None
         
         # Step 3: PDF Generation
         job.update_status('generating', 80, 'Generating PDF document...')
@@ -221,39 +590,12 @@ def run_conversion(job):
         pdf_path = pdf_generator.generate_pdf(job.temp_dir, ocr_dir)
         
         job.pdf_path = pdf_path
+        job.download_name = pdf_download_name(job)
         job.update_status('completed', 100, 'Conversion completed successfully!')
         
     except Exception as e:
         logger.error(f"Conversion failed for job {job.job_id}: {e}")
         job.update_status('failed', error=str(e))
-
-# Cleanup old jobs periodically (simple implementation)
-def cleanup_old_jobs():
-    """Remove old completed jobs to free memory"""
-    import time
-    current_time = datetime.now()
-    
-    jobs_to_remove = []
-    for job_id, job in conversion_jobs.items():
-        # Remove jobs older than 1 hour
-        if (current_time - job.created_at).total_seconds() > 3600:
-            jobs_to_remove.append(job_id)
-            # Clean up temporary directory
-            try:
-                import shutil
-                shutil.rmtree(job.temp_dir, ignore_errors=True)
-            except:
-                pass
-    
-    for job_id in jobs_to_remove:
-        del conversion_jobs[job_id]
-    
-    logger.info(f"Cleaned up {len(jobs_to_remove)} old jobs")
-
-# Start cleanup thread
-cleanup_thread = threading.Thread(target=lambda: [
-    time.sleep(1800) or cleanup_old_jobs() for _ in iter(int, 1)  # Run every 30 minutes
-])
-cleanup_thread.daemon = True
-cleanup_thread.start()
-
+    finally:
+        if ocr_pool is not None:
+            ocr_pool.shutdown(wait=False)
@@ -5,20 +5,300 @@ Uses WeasyPrint to generate PDF documents from scraped content and OCR text
 """
 
 import weasyprint
+import io
 import os
+import tempfile
 import json
 import logging
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import List, Dict, Optional
-import re
+from functools import lru_cache
+from itertools import repeat
+from typing import List, Dict, Optional, Tuple
 from urllib.parse import urlparse
 import base64
 
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the standard library
+    orjson = None
+
+try:
+    from pypdf import PdfWriter
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.lib.units import cm
+    from reportlab.platypus import PageBreak, Paragraph, SimpleDocTemplate
+except ImportError:  # ReportLab and pypdf are optional; only needed for fast=True
+    PdfWriter = None
+
+logger = logging.getLogger(__name__)
+
+# Parses UTF-8 JSON bytes or str
+if orjson is not None:
+    _loads = orjson.loads
+else:
+    _JSON_DECODER = json.JSONDecoder()
+    
+    def _loads(data):
+        # Our files are always UTF-8, so skip json.loads' per-call encoding detection
+        if isinstance(data, bytes):
+            data = data.decode('utf-8')
+        return _JSON_DECODER.decode(data)
+
+# Buffer size for the output PDF file
+PDF_WRITE_BUFFER_SIZE = 1 << 20
+
+# Escapes crawl-supplied text for HTML in a single pass
+_HTML_ESCAPE = str.maketrans({
+    '&': '&amp;',
+    '<': '&lt;',
+    '>': '&gt;',
+    '"': '&quot;',
+    "'": '&#39;',
+})
+
+
+def _esc(text) -> str:
+    """Escape text for insertion into HTML"""
+    return str(text).translate(_HTML_ESCAPE) if text else ''
+
+
+# Table of contents indentation by page depth
+_INDENT = tuple("  " * depth for depth in range(64))
+
+# One table of contents entry: page number, indentation, escaped title
+_TOC_ROW = """
+            <div class="toc-entry">
+                <span class="toc-page">Page {}</span>
+                <span>{}{}</span>
+            </div>
+            """.format
+
+
+def _truncate_title(title: str) -> str:
+    """Shorten long titles for the table of contents"""
+    return title if len(title) <= 60 else title[:57] + "..."
+
+
+# The parts of each OCR result the PDF uses; bounding boxes and text blocks are dropped
+OCR_FIELDS = ('image_path', 'success', 'full_text', 'confidence_avg')
+
+
+# Default CSS styles for PDF generation
+_DEFAULT_CSS = """
+@page {
+    size: A4;
+    margin: 2cm;
+    @top-center {
+        content: "Website to PDF Converter";
+        font-size: 10pt;
+        color: #666;
+    }
+    @bottom-center {
+        content: "Page " counter(page) " of " counter(pages);
+        font-size: 10pt;
+        color: #666;
+    }
+}
+
+body {
+    font-family: Arial, sans-serif;
+    font-size: 11pt;
+    line-height: 1.4;
+    color: #333;
+    margin: 0;
+    padding: 0;
+}
+
+.title-page {
+    text-align: center;
+    padding: 4cm 0;
+    page-break-after: always;
+}
+
+.title-page h1,
+.table-of-contents h2,
+.page-header h1 {
+    color: #2c3e50;
+}
+
+.title-page h1 {
+    font-size: 24pt;
+    margin-bottom: 1cm;
+}
+
+.title-page .subtitle {
+    font-size: 14pt;
+    color: #7f8c8d;
+    margin-bottom: 2cm;
+}
+
+.title-page .metadata {
+    font-size: 10pt;
+    color: #95a5a6;
+}
+
+.table-of-contents {
+    page-break-after: always;
+    margin-bottom: 2cm;
+}
+
+.table-of-contents h2 {
+    font-size: 18pt;
+    border-bottom: 2px solid #3498db;
+    padding-bottom: 0.5cm;
+    margin-bottom: 1cm;
+}
+
+.toc-entry {
+    margin-bottom: 0.3cm;
+    overflow: hidden;
+}
+
+.toc-page {
+    float: right;
+}
+
+.page-content {
+    page-break-before: always;
+    margin-bottom: 2cm;
+}
+
+.page-header {
+    border-bottom: 1px solid #bdc3c7;
+    padding-bottom: 0.5cm;
+    margin-bottom: 1cm;
+}
+
+.page-header h1 {
+    font-size: 16pt;
+    margin: 0;
+}
+
+.page-header .url,
+.page-header .metadata {
+    font-size: 9pt;
+    margin-top: 0.2cm;
+}
+
+.page-header .url {
+    color: #7f8c8d;
+    font-family: monospace;
+}
+
+.page-header .metadata {
+    color: #95a5a6;
+}
+
+.content-section {
+    margin-bottom: 1.5cm;
+}
+
+.content-section h2 {
+    font-size: 14pt;
+    color: #34495e;
+    margin-bottom: 0.5cm;
+}
+
+.content-text {
+    text-align: justify;
+    margin-bottom: 1cm;
+}
+
+.ocr-section {
+    background-color: #f8f9fa;
+    border-left: 4px solid #17a2b8;
+    padding: 0.5cm;
+    margin: 1cm 0;
+}
+
+.ocr-section h3 {
+    color: #17a2b8;
+    margin-top: 0;
+    margin-bottom: 0.3cm;
+    font-size: 11pt;
+}
+
+.ocr-text {
+    font-size: 10pt;
+    color: #495057;
+    font-style: italic;
+}
+
+.summary-section {
+    background-color: #e8f5e8;
+    border: 1px solid #28a745;
+    padding: 1cm;
+    margin: 1cm 0;
+}
+
+.summary-section h3 {
+    color: #155724;
+    margin-top: 0;
+}
+
+.stats-table {
+    width: 100%;
+    border-collapse: collapse;
+    margin: 0.5cm 0;
+}
+
+.stats-table th,
+.stats-table td {
+    border: 1px solid #dee2e6;
+    padding: 0.3cm;
+    text-align: left;
+}
+
+.stats-table th {
+    background-color: #f8f9fa;
+    font-weight: bold;
+}
+"""
+
+
+@lru_cache(maxsize=None)
+def _parse_css(css_styles: str) -> weasyprint.CSS:
+    """Parse a stylesheet once; generators sharing the same CSS reuse the result"""
+    return weasyprint.CSS(string=css_styles)
+
+
+def _read_json(path: str):
+    """Read and parse one JSON file (binary read skips the text decoder)"""
+    with open(path, 'rb') as f:
+        return _loads(f.read())
+
+
 class PDFGenerator:
     """
     PDF generator that creates PDF documents from web content and OCR text
     """
     
+    # CSS styles for PDF layout
+    css_styles = _DEFAULT_CSS
+    
+    # Per-page HTML, filled in by _generate_page_content
+    _PAGE_TMPL = """
+        <div class="page-content">
+            <div class="page-header">
+                <h1>{title}</h1>
+                <div class="url">{url}</div>
+                <div class="metadata">Depth: {depth} | Crawled: {timestamp}</div>
+            </div>
+            
+            {headings}
+            
+            <div class="content-section">
+                <h2>Page Content</h2>
+                <div class="content-text">{content}</div>
+            </div>
+            
+            {ocr}
+        </div>
+        """.format
+    
     def __init__(self, output_dir: str = None):
         """
         Initialize PDF generator
@@ -29,206 +309,29 @@ class PDFGenerator:
         self.output_dir = output_dir or '/tmp/pdf_output'
         os.makedirs(self.output_dir, exist_ok=True)
         
-        self.logger = logging.getLogger(__name__)
+        self.logger = logger
         
-        # CSS styles for PDF layout
-        self.css_styles = self._get_default_css()
+        # WeasyPrint gets the pre-parsed stylesheet
+        self._css_doc = _parse_css(self.css_styles)
     
-    def _get_default_css(self) -> str:
-        """
-        Get default CSS styles for PDF generation
-        
-        Returns:
-            str: CSS styles
+    @classmethod
+    def warmup(cls):
         """
-        return """
-        @page {
-            size: A4;
-            margin: 2cm;
-            @top-center {
-                content: "Website to PDF Converter";
-                font-size: 10pt;
-                color: #666;
-            }
-            @bottom-center {
-                content: "Page " counter(page) " of " counter(pages);
-                font-size: 10pt;
-                color: #666;
-            }
-        }
-        
-        body {
-            font-family: Arial, sans-serif;
-            font-size: 11pt;
-            line-height: 1.4;
-            color: #333;
-            margin: 0;
-            padding: 0;
-        }
-        
-        .title-page {
-            text-align: center;
-            padding: 4cm 0;
-            page-break-after: always;
-        }
-        
-        .title-page h1 {
-            font-size: 24pt;
-            color: #2c3e50;
-            margin-bottom: 1cm;
-        }
-        
-        .title-page .subtitle {
-            font-size: 14pt;
-            color: #7f8c8d;
-            margin-bottom: 2cm;
-        }
-        
-        .title-page .metadata {
-            font-size: 10pt;
-            color: #95a5a6;
-        }
-        
-        .table-of-contents {
-            page-break-after: always;
-            margin-bottom: 2cm;
-        }
-        
-        .table-of-contents h2 {
-            font-size: 18pt;
-            color: #2c3e50;
-            border-bottom: 2px solid #3498db;
-            padding-bottom: 0.5cm;
-            margin-bottom: 1cm;
-        }
-        
-        .toc-entry {
-            margin-bottom: 0.3cm;
-            display: flex;
-            justify-content: space-between;
-        }
-        
-        .toc-entry a {
-            text-decoration: none;
-            color: #2980b9;
-        }
-        
-        .toc-entry a:hover {
-            text-decoration: underline;
-        }
-        
-        .page-content {
-            page-break-before: always;
-            margin-bottom: 2cm;
-        }
-        
-        .page-header {
-            border-bottom: 1px solid #bdc3c7;
-            padding-bottom: 0.5cm;
-            margin-bottom: 1cm;
-        }
-        
-        .page-header h1 {
-            font-size: 16pt;
-            color: #2c3e50;
-            margin: 0;
-        }
-        
-        .page-header .url {
-            font-size: 9pt;
-            color: #7f8c8d;
-            font-family: monospace;
-            margin-top: 0.2cm;
-        }
-        
-        .page-header .metadata {
-            font-size: 9pt;
-            color: #95a5a6;
-            margin-top: 0.2cm;
-        }
-        
-        .content-section {
-            margin-bottom: 1.5cm;
-        }
-        
-        .content-section h2 {
-            font-size: 14pt;
-            color: #34495e;
-            margin-bottom: 0.5cm;
-        }
-        
-        .content-section h3 {
-            font-size: 12pt;
-            color: #34495e;
-            margin-bottom: 0.3cm;
-        }
-        
-        .content-text {
-            text-align: justify;
-            margin-bottom: 1cm;
-        }
-        
-        .ocr-section {
-            background-color: #f8f9fa;
-            border-left: 4px solid #17a2b8;
-            padding: 0.5cm;
-            margin: 1cm 0;
-        }
+        Render a throwaway document so the first real PDF doesn't pay for
+        WeasyPrint's one-off font and Pango initialisation
         
-        .ocr-section h3 {
-            color: #17a2b8;
-            margin-top: 0;
-            font-size: 11pt;
-        }
-        
-        .ocr-text {
-            font-size: 10pt;
-            color: #495057;
-            font-style: italic;
-        }
-        
-        .image-placeholder {
-            border: 1px dashed #dee2e6;
-            padding: 1cm;
-            text-align: center;
-            color: #6c757d;
-            margin: 0.5cm 0;
-            background-color: #f8f9fa;
-        }
-        
-        .summary-section {
-            background-color: #e8f5e8;
-            border: 1px solid #28a745;
-            padding: 1cm;
-            margin: 1cm 0;
-        }
-        
-        .summary-section h3 {
-            color: #155724;
-            margin-top: 0;
-        }
-        
-        .stats-table {
-            width: 100%;
-            border-collapse: collapse;
-            margin: 0.5cm 0;
-        }
-        
-        .stats-table th,
-        .stats-table td {
-            border: 1px solid #dee2e6;
-            padding: 0.3cm;
-            text-align: left;
-        }
-        
-        .stats-table th {
-            background-color: #f8f9fa;
-            font-weight: bold;
-        }
+        Also parses the default stylesheet into the shared cache. Call once
+        at application start-up.
         """
+        try:
+            weasyprint.HTML(string='<html><body>x</body></html>').write_pdf(
+                stylesheets=[_parse_css(cls.css_styles)]
+            )
+        except Exception as e:
+            logger.warning("PDF generator warmup failed: %s", e)
     
     def generate_pdf(self, crawl_data_dir: str, ocr_data_dir: str = None, 
-                    output_filename: str = None) -> str:
+                    output_filename: str = None, fast: bool = False) -> str:
         """
         Generate PDF from crawled data and OCR results
         
@@ -236,65 +339,177 @@ class PDFGenerator:
             crawl_data_dir (str): Directory containing crawled page data
             ocr_data_dir (str): Directory containing OCR results (optional)
             output_filename (str): Name of output PDF file (optional)
+            fast (bool): Render page content with ReportLab and only the title,
+                contents and summary with WeasyPrint. Much faster on large
+                crawls, but the body pages use plain ReportLab styling
         
         Returns:
             str: Path to generated PDF file
         """
         try:
-            # Load crawl data
-            crawl_summary = self._load_crawl_summary(crawl_data_dir)
-            page_data = self._load_page_data(crawl_data_dir)
+            crawl_summary, page_data, ocr_data = self._load_all(crawl_data_dir, ocr_data_dir)
             
-            # Load OCR data if available
-            ocr_data = {}
-            if ocr_data_dir and os.path.exists(ocr_data_dir):
-                ocr_data = self._load_ocr_data(ocr_data_dir)
+            # Parsed once and shared by the title page and the output filename
+            generated_at = datetime.now()
+            domain = urlparse(crawl_summary.get('start_url', '')).netloc
             
-            # Generate HTML content
-            html_content = self._generate_html(crawl_summary, page_data, ocr_data)
-            
-            # Generate PDF
             if not output_filename:
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                domain = urlparse(crawl_summary.get('start_url', '')).netloc
+                timestamp = generated_at.strftime("%Y%m%d_%H%M%S")
                 output_filename = f"website_pdf_{domain}_{timestamp}.pdf"
             
             output_path = os.path.join(self.output_dir, output_filename)
             
-            # Create PDF using WeasyPrint
-            html_doc = weasyprint.HTML(string=html_content)
-            css_doc = weasyprint.CSS(string=self.css_styles)
-            
-            html_doc.write_pdf(output_path, stylesheets=[css_doc])
+            # Render into a temporary file beside the target and move it into place
+            # on success, so a failed render never leaves a partial PDF behind
+            fd, tmp_path = tempfile.mkstemp(dir=self.output_dir, suffix='.pdf.tmp')
+            try:
+                # A large write buffer turns WeasyPrint's many small writes into few syscalls
+                with open(fd, 'wb', buffering=PDF_WRITE_BUFFER_SIZE) as f:
+                    self._write_document(f, crawl_summary, page_data, ocr_data,
+                                         domain, generated_at, fast)
+                os.replace(tmp_path, output_path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
             
-            self.logger.info(f"PDF generated successfully: {output_path}")
+            self.logger.info("PDF generated successfully: %s", output_path)
             return output_path
             
         except Exception as e:
-            self.logger.error(f"PDF generation failed: {e}")
+            self.logger.error("PDF generation failed: %s", e)
             raise
     
+    def generate_pdf_bytes(self, crawl_data_dir: str, ocr_data_dir: str = None,
+                           fast: bool = False) -> bytes:
+        """
+        Generate PDF from crawled data and OCR results without writing it to disk
+        
+        Args:
+            crawl_data_dir (str): Directory containing crawled page data
+            ocr_data_dir (str): Directory containing OCR results (optional)
+            fast (bool): See generate_pdf
+        
+        Returns:
+            bytes: The PDF document
+        """
+        try:
+            crawl_summary, page_data, ocr_data = self._load_all(crawl_data_dir, ocr_data_dir)
+            domain = urlparse(crawl_summary.get('start_url', '')).netloc
+            
+            pdf_bytes = self._write_document(None, crawl_summary, page_data, ocr_data,
+                                             domain, datetime.now(), fast)
+            
+            self.logger.info("PDF generated successfully: %d bytes", len(pdf_bytes))
+            return pdf_bytes
+            
+        except Exception as e:
+            self.logger.error("PDF generation failed: %s", e)
+            raise
+    
+    def generate_pdfs(self, crawl_data_dirs: List[str], ocr_data_dirs: List[str] = None,
+                      fast: bool = False) -> List[bytes]:
+        """
+        Generate one PDF per crawl, sharing the parsed stylesheet and font setup
+        
+        Args:
+            crawl_data_dirs (list): Directories containing crawled page data
+            ocr_data_dirs (list): OCR results directory for each crawl (optional;
+                entries may be None)
+            fast (bool): See generate_pdf
+        
+        Returns:
+            list: PDF documents as bytes, in the order of crawl_data_dirs
+        """
+        if ocr_data_dirs is None:
+            ocr_data_dirs = [None] * len(crawl_data_dirs)
+        
+        # Much of each render is Pango/HarfBuzz text layout and pydyf's file
+        # output, which run outside the GIL, so the documents overlap
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+            return list(executor.map(self.generate_pdf_bytes, crawl_data_dirs,
+                                     ocr_data_dirs, repeat(fast)))
+    
+    def _write_document(self, target, crawl_summary: Dict, page_data: List[Dict],
+                        ocr_data: Dict, domain: str, generated_at: datetime,
+                        fast: bool) -> Optional[bytes]:
+        """
+        Render the PDF document
+        
+        Args:
+            target: Binary file object to write to, or None to return the PDF
+            crawl_summary (dict): Crawl summary data
+            page_data (list): List of page data
+            ocr_data (dict): OCR results data
+            domain (str): Domain of the crawl's start URL
+            generated_at (datetime): Time the PDF is generated
+            fast (bool): Render page content with ReportLab (see generate_pdf)
+        
+        Returns:
+            bytes: The PDF document if target is None, otherwise None
+        """
+        if fast and PdfWriter is None:
+            self.logger.warning("ReportLab/pypdf not available, generating PDF with WeasyPrint only")
+            fast = False
+        
+        # Generate HTML content (just the front matter on the fast path)
+        html_content = self._generate_html(crawl_summary, page_data, ocr_data,
+                                           domain, generated_at, include_pages=not fast)
+        
+        # Create PDF using WeasyPrint; without a target it returns the bytes
+        html_doc = weasyprint.HTML(string=html_content)
+        if not fast:
+            return html_doc.write_pdf(target=target, stylesheets=[self._css_doc])
+        
+        ocr_by_page = self._index_ocr_by_page(crawl_summary, page_data, ocr_data)
+        writer = PdfWriter()
+        writer.append(io.BytesIO(html_doc.write_pdf(stylesheets=[self._css_doc])))
+        if page_data:
+            writer.append(self._render_pages_reportlab(page_data, ocr_by_page))
+        
+        if target is None:
+            buf = io.BytesIO()
+            writer.write(buf)
+            return buf.getvalue()
+        writer.write(target)
+        return None
+    
+    def _load_all(self, crawl_data_dir: str,
+                  ocr_data_dir: str = None) -> Tuple[Dict, List[Dict], Dict]:
+        """Load the crawl summary, page data and OCR results (if available)"""
+        crawl_summary = self._load_crawl_summary(crawl_data_dir)
+        page_data = self._load_page_data(crawl_data_dir)
+        
+        ocr_data = {}
+        if ocr_data_dir and os.path.exists(ocr_data_dir):
+            ocr_data = self._load_ocr_data(ocr_data_dir)
+        
+        return crawl_summary, page_data, ocr_data
+    
     def _load_crawl_summary(self, crawl_data_dir: str) -> Dict:
         """Load crawl summary data"""
         summary_path = os.path.join(crawl_data_dir, 'crawl_summary.json')
         if not os.path.exists(summary_path):
             raise FileNotFoundError(f"Crawl summary not found: {summary_path}")
         
-        with open(summary_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return _read_json(summary_path)
     
     def _load_page_data(self, crawl_data_dir: str) -> List[Dict]:
         """Load all page data from crawl results"""
+        # Pages are exported to a JSON Lines feed; older runs wrote one file per page
+        feed_path = os.path.join(crawl_data_dir, 'pages.jsonl')
         pages_dir = os.path.join(crawl_data_dir, 'pages')
-        if not os.path.exists(pages_dir):
-            raise FileNotFoundError(f"Pages directory not found: {pages_dir}")
-        
-        page_data = []
-        for filename in os.listdir(pages_dir):
-            if filename.endswith('.json'):
-                filepath = os.path.join(pages_dir, filename)
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    page_data.append(json.load(f))
+        if os.path.exists(feed_path):
+            with open(feed_path, 'rb') as f:
+                page_data = [_loads(line) for line in f if line.strip()]
+        elif os.path.exists(pages_dir):
+            # File reads release the GIL, so loading many small page files overlaps
+            with os.scandir(pages_dir) as entries:
+                page_files = [entry.path for entry in entries
+                              if entry.name.endswith('.json') and entry.is_file(follow_symlinks=False)]
+            with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4)) as executor:
+                page_data = list(executor.map(_read_json, page_files))
+        else:
+            raise FileNotFoundError(f"Page data not found in {crawl_data_dir}")
         
         # Sort by depth and URL
         page_data.sort(key=lambda x: (x.get('depth', 0), x.get('url', '')))
@@ -304,22 +519,33 @@ class PDFGenerator:
         """Load OCR results data"""
         ocr_data = {}
         
-        # Load OCR summary if available
+        # Per-image results are streamed to a JSON Lines file; older runs
+        # embedded them in the OCR summary instead
+        stream_path = os.path.join(ocr_data_dir, 'ocr_stream.jsonl')
         summary_path = os.path.join(ocr_data_dir, 'ocr_summary.json')
-        if os.path.exists(summary_path):
-            with open(summary_path, 'r', encoding='utf-8') as f:
-                ocr_summary = json.load(f)
-                
-                # Index OCR results by image filename
-                for result in ocr_summary.get('results', []):
-                    image_path = result.get('image_path', '')
-                    filename = os.path.basename(image_path)
-                    ocr_data[filename] = result
+        if os.path.exists(stream_path):
+            with open(stream_path, 'rb') as f:
+                # One line at a time, so only the slim records below stay in memory
+                for line in f:
+                    if line.strip():
+                        self._index_ocr_result(ocr_data, _loads(line))
+        elif os.path.exists(summary_path):
+            for result in _read_json(summary_path).get('results', []):
+                self._index_ocr_result(ocr_data, result)
         
         return ocr_data
     
+    @staticmethod
+    def _index_ocr_result(ocr_data: Dict, result: Dict):
+        """Index an OCR result by image filename, keeping only the fields the PDF uses"""
+        image_path = result.get('image_path', '')
+        ocr_data[os.path.basename(image_path)] = {
+            field: result[field] for field in OCR_FIELDS if field in result
+        }
+    
     def _generate_html(self, crawl_summary: Dict, page_data: List[Dict], 
-                      ocr_data: Dict) -> str:
+                      ocr_data: Dict, domain: str, generated_at: datetime,
+                      include_pages: bool = True) -> str:
         """
         Generate HTML content for PDF
         
@@ -327,14 +553,18 @@ class PDFGenerator:
             crawl_summary (dict): Crawl summary data
             page_data (list): List of page data
             ocr_data (dict): OCR results data
+            domain (str): Domain of the crawl's start URL
+            generated_at (datetime): Time the PDF is generated
+            include_pages (bool): Include the content of every page
         
         Returns:
             str: HTML content
         """
-        html_parts = []
+        buf = io.StringIO()
+        write = buf.write
         
         # HTML document start
-        html_parts.append("""
+        write("""
         <!DOCTYPE html>
         <html lang="en">
         <head>
@@ -346,30 +576,121 @@ class PDFGenerator:
         """)
         
         # Title page
-        html_parts.append(self._generate_title_page(crawl_summary))
+        write(self._generate_title_page(crawl_summary, domain, generated_at))
         
         # Table of contents
-        html_parts.append(self._generate_table_of_contents(page_data))
+        write(self._generate_table_of_contents(page_data))
         
         # Summary section
-        html_parts.append(self._generate_summary_section(crawl_summary, ocr_data))
+        write(self._generate_summary_section(crawl_summary, ocr_data))
         
         # Page content
-        for page in page_data:
-            html_parts.append(self._generate_page_content(page, ocr_data))
+        if include_pages:
+            ocr_by_page = self._index_ocr_by_page(crawl_summary, page_data, ocr_data)
+            for page in page_data:
+                write(self._generate_page_content(page, ocr_by_page))
         
         # HTML document end
-        html_parts.append("""
+        write("""
         </body>
         </html>
         """)
         
-        return ''.join(html_parts)
+        return buf.getvalue()
+    
+    def _index_ocr_by_page(self, crawl_summary: Dict, page_data: List[Dict],
+                           ocr_data: Dict) -> Dict[str, List]:
+        """
+        Group OCR results that found text by the URL of the page their image came from
+        
+        Args:
+            crawl_summary (dict): Crawl summary data, with the page of each image
+            page_data (list): List of page data
+            ocr_data (dict): OCR results data, keyed by image filename
+        
+        Returns:
+            dict: Page URL -> list of (image filename, OCR result)
+        """
+        image_pages = {img.get('filename'): img.get('page_url')
+                       for img in crawl_summary.get('images', [])}
+        page_urls = {page.get('url', '') for page in page_data}
+        # Images whose page is unknown (e.g. crawls from before images were
+        # recorded) are attached to the last page
+        fallback_url = page_data[-1].get('url', '') if page_data else ''
+        
+        ocr_by_page = defaultdict(list)
+        for filename, ocr_result in ocr_data.items():
+            if (ocr_result.get('success', False) and 
+                ocr_result.get('full_text', '').strip()):
+                page_url = image_pages.get(filename)
+                if page_url not in page_urls:
+                    page_url = fallback_url
+                ocr_by_page[page_url].append((filename, ocr_result))
+        
+        return ocr_by_page
+    
+    def _render_pages_reportlab(self, page_data: List[Dict],
+                                ocr_by_page: Dict[str, List]) -> io.BytesIO:
+        """
+        Render the content of every page as PDF with ReportLab
+        
+        Args:
+            page_data (list): List of page data
+            ocr_by_page (dict): OCR results grouped by page URL
+        
+        Returns:
+            io.BytesIO: The rendered PDF
+        """
+        styles = getSampleStyleSheet()
+        story = []
+        
+        for page in page_data:
+            if story:
+                story.append(PageBreak())
+            
+            url = page.get('url', '')
+            story.append(Paragraph(_esc(page.get('title', 'Untitled')), styles['Heading1']))
+            story.append(Paragraph(_esc(url), styles['Code']))
+            story.append(Paragraph(
+                f"Depth: {page.get('depth', 0)} | Crawled: {_esc(page.get('timestamp', ''))}",
+                styles['Italic']
+            ))
+            
+            headings = page.get('headings', [])
+            if headings:
+                story.append(Paragraph('Page Structure', styles['Heading2']))
+                for heading in headings:
+                    indent = '&nbsp;&nbsp;' * (heading.get('level', 1) - 1)
+                    story.append(Paragraph(f"{indent}• {_esc(heading.get('text', ''))}",
+                                           styles['Normal']))
+            
+            story.append(Paragraph('Page Content', styles['Heading2']))
+            content = ' '.join(page.get('content', '').split()) or 'No content available.'
+            for paragraph in content.split('. '):
+                story.append(Paragraph(_esc(paragraph), styles['BodyText']))
+            
+            page_ocr = ocr_by_page.get(url, ())
+            if page_ocr:
+                story.append(Paragraph('Text Extracted from Images', styles['Heading2']))
+                for filename, ocr_result in page_ocr:
+                    story.append(Paragraph(f"Text Extracted from Image: {_esc(filename)}",
+                                           styles['Heading3']))
+                    story.append(Paragraph(_esc(ocr_result.get('full_text', '')), styles['Italic']))
+                    story.append(Paragraph(
+                        f"Confidence: {ocr_result.get('confidence_avg', 0):.1%}",
+                        styles['Normal']
+                    ))
+        
+        buf = io.BytesIO()
+        SimpleDocTemplate(buf, pagesize=A4, leftMargin=2 * cm, rightMargin=2 * cm,
+                          topMargin=2 * cm, bottomMargin=2 * cm).build(story)
+        buf.seek(0)
+        return buf
     
-    def _generate_title_page(self, crawl_summary: Dict) -> str:
+    def _generate_title_page(self, crawl_summary: Dict, domain: str,
+                             generated_at: datetime) -> str:
         """Generate title page HTML"""
         start_url = crawl_summary.get('start_url', 'Unknown URL')
-        domain = urlparse(start_url).netloc
         crawl_time = crawl_summary.get('crawl_time', 'Unknown')
         
         return f"""
@@ -377,36 +698,21 @@ class PDFGenerator:
             <h1>Website to PDF Conversion</h1>
             <div class="subtitle">Complete website content with OCR text extraction</div>
             <div class="metadata">
-                <p><strong>Source:</strong> {start_url}</p>
-                <p><strong>Domain:</strong> {domain}</p>
-                <p><strong>Generated:</strong> {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
-                <p><strong>Crawled:</strong> {crawl_time}</p>
+                <p><strong>Source:</strong> {_esc(start_url)}</p>
+                <p><strong>Domain:</strong> {_esc(domain)}</p>
+                <p><strong>Generated:</strong> {generated_at.strftime('%Y-%m-%d %H:%M:%S')}</p>
+                <p><strong>Crawled:</strong> {_esc(crawl_time)}</p>
             </div>
         </div>
         """
     
     def _generate_table_of_contents(self, page_data: List[Dict]) -> str:
         """Generate table of contents HTML"""
-        toc_entries = []
-        
-        for i, page in enumerate(page_data, 1):
-            title = page.get('title', 'Untitled')
-            url = page.get('url', '')
-            depth = page.get('depth', 0)
-            
-            # Truncate long titles
-            if len(title) > 60:
-                title = title[:57] + "..."
-            
-            # Add indentation based on depth
-            indent = "  " * depth
-            
-            toc_entries.append(f"""
-            <div class="toc-entry">
-                <span>{indent}{title}</span>
-                <span>Page {i}</span>
-            </div>
-            """)
+        toc_entries = [
+            _TOC_ROW(i, _INDENT[min(page.get('depth', 0), len(_INDENT) - 1)],
+                     _esc(_truncate_title(page.get('title', 'Untitled'))))
+            for i, page in enumerate(page_data, 1)
+        ]
         
         return f"""
         <div class="table-of-contents">
@@ -439,7 +745,8 @@ class PDFGenerator:
         </div>
         """
     
-    def _generate_page_content(self, page: Dict, ocr_data: Dict) -> str:
+    @classmethod
+    def _generate_page_content(cls, page: Dict, ocr_by_page: Dict[str, List]) -> str:
         """Generate HTML content for a single page"""
         title = page.get('title', 'Untitled')
         url = page.get('url', '')
@@ -448,34 +755,20 @@ class PDFGenerator:
         timestamp = page.get('timestamp', '')
         
         # Clean and format content
-        content = self._clean_html_content(content)
+        content = cls._clean_html_content(content)
         
         # Generate headings structure
-        headings_html = self._generate_headings_html(page.get('headings', []))
+        headings_html = cls._generate_headings_html(page.get('headings', []))
         
         # Generate OCR content if available
-        ocr_html = self._generate_ocr_content_html(page, ocr_data)
+        ocr_html = cls._generate_ocr_content_html(page, ocr_by_page)
         
-        return f"""
-        <div class="page-content">
-            <div class="page-header">
-                <h1>{title}</h1>
-                <div class="url">{url}</div>
-                <div class="metadata">Depth: {depth} | Crawled: {timestamp}</div>
-            </div>
-            
-            {headings_html}
-            
-            <div class="content-section">
-                <h2>Page Content</h2>
-                <div class="content-text">{content}</div>
-            </div>
-            
-            {ocr_html}
-        </div>
-        """
+        return cls._PAGE_TMPL(title=_esc(title), url=_esc(url), depth=depth,
+                              timestamp=_esc(timestamp), headings=headings_html,
+                              content=content, ocr=ocr_html)
     
-    def _generate_headings_html(self, headings: List[Dict]) -> str:
+    @staticmethod
+    def _generate_headings_html(headings: List[Dict]) -> str:
         """Generate HTML for page headings structure"""
         if not headings:
             return ""
@@ -485,7 +778,7 @@ class PDFGenerator:
             level = heading.get('level', 1)
             text = heading.get('text', '')
             indent = "  " * (level - 1)
-            headings_list.append(f"{indent}• {text}")
+            headings_list.append(f"{indent}• {_esc(text)}")
         
         return f"""
         <div class="content-section">
@@ -494,25 +787,21 @@ class PDFGenerator:
         </div>
         """
     
-    def _generate_ocr_content_html(self, page: Dict, ocr_data: Dict) -> str:
+    @staticmethod
+    def _generate_ocr_content_html(page: Dict, ocr_by_page: Dict[str, List]) -> str:
         """Generate HTML for OCR content related to this page"""
         page_url = page.get('url', '')
         ocr_sections = []
         
-        # Find OCR results for images from this page
-        for filename, ocr_result in ocr_data.items():
-            if (ocr_result.get('success', False) and 
-                ocr_result.get('full_text', '').strip()):
-                
-                # Check if this OCR result is from the current page
-                # (This is a simplified check - in practice, you'd want better tracking)
-                text = ocr_result.get('full_text', '')
-                confidence = ocr_result.get('confidence_avg', 0)
-                
-                ocr_sections.append(f"""
+        # OCR results for images from this page
+        for filename, ocr_result in ocr_by_page.get(page_url, ()):
+            text = ocr_result.get('full_text', '')
+            confidence = ocr_result.get('confidence_avg', 0)
+            
+            ocr_sections.append(f"""
                 <div class="ocr-section">
-                    <h3>Text Extracted from Image: {filename}</h3>
-                    <div class="ocr-text">{text}</div>
+                    <h3>Text Extracted from Image: {_esc(filename)}</h3>
+                    <div class="ocr-text">{_esc(text)}</div>
                     <div style="font-size: 9pt; color: #6c757d; margin-top: 0.3cm;">
                         Confidence: {confidence:.1%}
                     </div>
@@ -529,20 +818,19 @@ class PDFGenerator:
         
         return ""
     
-    def _clean_html_content(self, content: str) -> str:
+    @staticmethod
+    def _clean_html_content(content: str) -> str:
         """Clean and format content for PDF"""
         if not content:
             return "No content available."
         
-        # Remove excessive whitespace
-        content = re.sub(r'\s+', ' ', content.strip())
+        # Remove excessive whitespace; escape before adding paragraph markup
+        content = _esc(' '.join(content.split()))
         
         # Split into paragraphs for better formatting
-        paragraphs = content.split('. ')
-        if len(paragraphs) > 1:
+        if '. ' in content:
             # Join with proper paragraph breaks
-            content = '</p><p>'.join(paragraphs)
-            content = f'<p>{content}</p>'
+            content = f"<p>{'</p><p>'.join(content.split('. '))}</p>"
         
         return content
 
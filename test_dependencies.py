@@ -3,6 +3,8 @@
 Test script to verify all required dependencies are working properly
 """
 
+from importlib.util import find_spec
+
 def test_scrapy():
     """Test Scrapy import and basic functionality"""
     try:
@@ -44,27 +46,20 @@ def test_flask():
         return False
 
 def test_supporting_libraries():
-    """Test supporting libraries"""
+    """Test supporting libraries are installed (without importing them)"""
     libraries = [
-        ('requests', 'HTTP requests'),
-        ('beautifulsoup4', 'HTML parsing'),
-        ('pillow', 'Image processing'),
+        ('selectolax', 'HTML parsing'),
+        ('PIL', 'Image processing'),
         ('lxml', 'XML/HTML parsing')
     ]
     
     results = []
-    for lib_name, description in libraries:
-        try:
-            if lib_name == 'beautifulsoup4':
-                import bs4
-            elif lib_name == 'pillow':
-                import PIL
-            else:
-                __import__(lib_name)
-            print(f"✓ {description} library imported successfully")
+    for module_name, description in libraries:
+        if find_spec(module_name) is not None:
+            print(f"✓ {description} library found")
             results.append(True)
-        except ImportError as e:
-            print(f"✗ {description} library import failed: {e}")
+        else:
+            print(f"✗ {description} library not found ({module_name})")
             results.append(False)
     
     return all(results)
@@ -0,0 +1,25 @@
+"""
+Regression tests for GPU inference in the OCR processor
+"""
+
+import pytest
+
+torch = pytest.importorskip('torch')
+pytest.importorskip('easyocr')
+np = pytest.importorskip('numpy')
+
+import easyocr
+
+from ocr_processor import _Float16Forward, _enable_half_precision
+
+
+@pytest.mark.skipif(not torch.cuda.is_available(), reason='needs CUDA')
+def test_detection_runs_under_float16():
+    reader = easyocr.Reader(['en'], gpu=True)
+    _enable_half_precision(reader)
+    assert isinstance(reader.detector, _Float16Forward)
+    
+    # CRAFT's score maps must reach cv2.threshold as float32
+    image = np.full((64, 256, 3), 255, dtype=np.uint8)
+    reader.detect(image)
+    reader.readtext(image)
@@ -0,0 +1,28 @@
+"""
+Regression tests for page content extraction in the web crawler
+"""
+
+import pytest
+
+pytest.importorskip('scrapy')
+lexbor = pytest.importorskip('selectolax.lexbor')
+
+from web_crawler import WebsiteCrawlerSpider
+
+
+@pytest.fixture
+def spider(tmp_path):
+    return WebsiteCrawlerSpider(start_url='https://example.com/', output_dir=str(tmp_path))
+
+
+@pytest.mark.parametrize('html, expected', [
+    # A preferred content element nested inside a less preferred one wins
+    ('<div class="content"><p>outer</p><main>in main <b>main text</b></main></div>',
+     'in main main text'),
+    ('<div id="content"><article>article text</article> rest</div>', 'article text'),
+    # Without any content element the body is used
+    ('<p>just body</p>', 'just body'),
+])
+def test_extract_main_content_prefers_selector_order(spider, html, expected):
+    tree = lexbor.LexborHTMLParser(f'<html><body>{html}</body></html>')
+    assert spider.extract_main_content(tree) == expected